@@ -1,38 +1,89 @@
 # backend/main.py
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+import asyncio
+import hashlib
+import hmac
 import os
+import re
+import string
+import time
+from contextlib import asynccontextmanager
 from enum import Enum
-from typing import List, Optional
+from typing import Optional
 
+import orjson
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, Header, HTTPException, Query, BackgroundTasks
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, EmailStr, field_validator
-from sqlalchemy import Column, Date, DateTime, Integer, String, create_engine
-from sqlalchemy.orm import Session, declarative_base, sessionmaker
-
-import smtplib
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, field_validator
+from sqlalchemy import DateTime, Index, delete, func, insert, select, text, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+import aiosmtplib
 from email.mime.text import MIMEText
 
 # --- config & DB engine ---
 load_dotenv()
 
 ADMIN_SECRET = os.getenv("ADMIN_SECRET", "changeme")
+_EXPECTED_SECRET = (ADMIN_SECRET or "").strip().encode()  # trimmed once, compared per request
 FRONTEND_ORIGIN = os.getenv("FRONTEND_ORIGIN", "*")
 
 # Use Neon Postgres in prod (DATABASE_URL), fallback to local SQLite in dev
 DB_URL = os.getenv("DATABASE_URL", "sqlite:///./family_bookings.db")
 
-engine = create_engine(
-    DB_URL,
-    connect_args={"check_same_thread": False} if DB_URL.startswith("sqlite") else {},
-    pool_pre_ping=True,  # helpful for serverless Postgres (Neon)
+# Swap in the async drivers (asyncpg / aiosqlite). asyncpg doesn't understand
+# libpq-style query params, so translate sslmode/channel_binding for Neon URLs.
+_url = make_url(DB_URL)
+_connect_args = {}
+if _url.drivername.startswith("sqlite"):
+    _url = _url.set(drivername="sqlite+aiosqlite")
+else:
+    _query = dict(_url.query)
+    _sslmode = _query.pop("sslmode", None)
+    _query.pop("channel_binding", None)
+    _url = _url.set(drivername="postgresql+asyncpg", query=_query)
+    if _sslmode in ("require", "verify-ca", "verify-full"):
+        _connect_args["ssl"] = True
+
+# Pool tuned for serverless Postgres (Neon): a small LIFO pool keeps the same
+# few connections warm, and recycling under Neon's ~300s idle kill means we
+# never hand out a dead connection — cheaper than a pre-ping SELECT 1 on
+# every checkout.
+engine = create_async_engine(
+    _url,
+    connect_args=_connect_args,
+    pool_size=2,
+    max_overflow=4,
+    pool_recycle=280,
+    pool_use_lifo=True,
 )
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
-Base = declarative_base()
+SessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+class Base(DeclarativeBase):
+    pass
 
 # --- FastAPI app + CORS ---
-app = FastAPI(title="Family Apartment Booking")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with engine.begin() as conn:
+        await conn.run_sync(_init_schema)
+    email_worker = asyncio.create_task(_email_worker())
+    cleanup_worker = asyncio.create_task(_cleanup_worker())
+    yield
+    email_worker.cancel()
+    cleanup_worker.cancel()
+    await engine.dispose()
+
+app = FastAPI(
+    title="Family Apartment Booking",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -47,40 +98,118 @@ SENDER_EMAIL = os.getenv("SENDER_EMAIL", "youraddress@gmail.com")
 SENDER_PASS = os.getenv("SENDER_PASS", "app_password")  # Gmail App Password
 NOTIFY_EMAIL = os.getenv("NOTIFY_EMAIL", "yuvalspam765@gmail.com")
 
+# Emails go through an asyncio queue drained by a single lifespan task, so
+# endpoints never block a thread on SMTP. The worker keeps one logged-in
+# connection alive instead of paying TLS + AUTH per message.
+email_queue: asyncio.Queue = asyncio.Queue()
+
 def send_email(to_email: str, subject: str, body: str):
-    msg = MIMEText(body, "plain")
-    msg["Subject"] = subject
-    msg["From"] = SENDER_EMAIL
-    msg["To"] = to_email
+    email_queue.put_nowait((to_email, subject, body))
+
+# one subject per decision, looked up by the row's new status
+DECISION_SUBJECTS = {
+    "approved": "🎉 Your booking has been approved",
+    "rejected": "❌ Your booking has been rejected",
+    "cancelled": "⚠️ Your booking has been cancelled",
+}
+
+# bodies are compiled once at import; substitute() fills them per send
+DECISION_BODY_TPL = string.Template(
+    "Hi $name,\n\nYour booking request for $start → $end has been $status.\n"
+)
+NEW_REQUEST_BODY_TPL = string.Template(
+    "A new booking request has been submitted.\n\n"
+    "Name: $name\n"
+    "Email: $email\n"
+    "Dates: $start → $end\n"
+    "Notes: $notes\n"
+    "Status: $status\n\n"
+    "For managing requests: https://booking-app-com.onrender.com\n"
+)
 
-    with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-        server.login(SENDER_EMAIL, SENDER_PASS)
-        server.send_message(msg)
+def notify_decision(row: "Booking"):
+    subject = DECISION_SUBJECTS[row.status]
+    body = DECISION_BODY_TPL.substitute(
+        name=row.requester_name,
+        start=row.start_date,
+        end=row.end_date,
+        status=row.status,
+    )
+    send_email(row.requester_email, subject, body)
+
+async def _email_worker():
+    smtp = aiosmtplib.SMTP(
+        hostname="smtp.gmail.com",
+        port=465,
+        use_tls=True,
+        username=SENDER_EMAIL,
+        password=SENDER_PASS,
+    )
+    while True:
+        to_email, subject, body = await email_queue.get()
+        msg = MIMEText(body, "plain")
+        msg["Subject"] = subject
+        msg["From"] = SENDER_EMAIL
+        msg["To"] = to_email
+        try:
+            if not smtp.is_connected:
+                await smtp.connect()
+            await smtp.send_message(msg)
+        except (aiosmtplib.SMTPException, OSError) as e:
+            print(f"❌ Email to {to_email} failed: {e}")
+            try:
+                await smtp.quit()
+            except Exception:
+                pass  # connection is stale anyway; next message reconnects
+        finally:
+            email_queue.task_done()
 
 # --- DB Model ---
 class Booking(Base):
     __tablename__ = "bookings"
-    id = Column(Integer, primary_key=True)
-    requester_name = Column(String, nullable=False)
-    requester_email = Column(String, nullable=False)
-    start_date = Column(Date, nullable=False) 
-    end_date = Column(Date, nullable=False)   
-    status = Column(String, default="pending", nullable=False)  # pending/approved/rejected/cancelled
-    notes = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    decision_at = Column(DateTime, nullable=True)
-    decided_by = Column(String, nullable=True)
-
-# create tables if they don't exist
-Base.metadata.create_all(engine)
+    __table_args__ = (
+        # backs the approve-conflict check (status + date-range overlap)
+        Index("ix_bookings_status_start_end", "status", "start_date", "end_date"),
+        # backs cleanup_old_requests (status + decision_at cutoff)
+        Index("ix_bookings_status_decision_at", "status", "decision_at"),
+    )
+    id: Mapped[int] = mapped_column(primary_key=True)
+    requester_name: Mapped[str]
+    requester_email: Mapped[str]
+    start_date: Mapped[date]
+    end_date: Mapped[date]
+    status: Mapped[str] = mapped_column(default="pending")  # pending/approved/rejected/cancelled
+    notes: Mapped[Optional[str]]
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    decision_at: Mapped[Optional[datetime]]
+    decided_by: Mapped[Optional[str]]
+
+# create tables if they don't exist (run via conn.run_sync in the lifespan,
+# since the async engine can't execute DDL at import time)
+def _init_schema(conn):
+    Base.metadata.create_all(conn)
+    # create_all skips indexes on tables that already exist, so add them explicitly
+    for index in Booking.__table_args__:
+        index.create(conn, checkfirst=True)
+    # On Postgres, an EXCLUDE constraint makes the DB itself reject overlapping
+    # approved bookings, closing the check-then-approve race between two admins.
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        conn.execute(text("""
+            DO $$
+            BEGIN
+                ALTER TABLE bookings ADD CONSTRAINT no_overlap
+                    EXCLUDE USING gist (daterange(start_date, end_date, '[)') WITH &&)
+                    WHERE (status = 'approved');
+            EXCEPTION WHEN duplicate_table OR duplicate_object THEN
+                NULL;  -- constraint already exists
+            END $$;
+        """))
 
 # --- DI session ---
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # --- Schemas ---
 class Status(str, Enum):
@@ -89,13 +218,24 @@ class Status(str, Enum):
     rejected = "rejected"
     cancelled = "cancelled"
 
+# good-enough shape check; full RFC validation isn't worth the cost here,
+# delivery failures surface in the email worker anyway
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
 class BookingIn(BaseModel):
     requester_name: str
-    requester_email: EmailStr
-    start_date: date     
-    end_date: date       
+    requester_email: str
+    start_date: date
+    end_date: date
     notes: Optional[str] = None
 
+    @field_validator("requester_email")
+    @classmethod
+    def check_email(cls, v):
+        if not EMAIL_RE.match(v):
+            raise ValueError("requester_email is not a valid email address.")
+        return v
+
     @field_validator("end_date")
     @classmethod
     def check_range(cls, v, info):
@@ -113,215 +253,273 @@ class BookingOut(BaseModel):
     status: Status
     notes: Optional[str]
 
-    class Config:
-        from_attributes = True  # pydantic v2
+    model_config = ConfigDict(from_attributes=True)
 
 # class CancelIn(BaseModel):
 #     reason: Optional[str] = None
 
 # --- helpers ---
+def utcnow() -> datetime:
+    # naive UTC (the columns are timestamp-without-tz); datetime.utcnow is deprecated
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 def overlaps(a_start: date, a_end: date, b_start: date, b_end: date) -> bool:
     
     return (a_end > b_start) and (b_end > a_start)
 
 def require_admin(secret: Optional[str]):
-    expected = (ADMIN_SECRET or "").strip()
-    got = (secret or "").strip()
-    if got != expected:
+    got = (secret or "").strip().encode()
+    # constant-time compare: no timing side-channel on the secret
+    if not hmac.compare_digest(got, _EXPECTED_SECRET):
         raise HTTPException(status_code=401, detail="Unauthorized (bad admin secret)")
 
-def cleanup_old_requests(db: Session):
-    cutoff = datetime.utcnow() - timedelta(days=15)
-    db.query(Booking).filter(
-        Booking.status.in_(["cancelled", "rejected"]),
-        Booking.decision_at < cutoff
-    ).delete(synchronize_session=False)
-    db.commit()
+CLEANUP_BATCH = 1000
+
+async def cleanup_old_requests(db: AsyncSession):
+    cutoff = utcnow() - timedelta(days=15)
+    # delete in batches with short transactions instead of one unbounded
+    # DELETE holding row locks over the whole range
+    while True:
+        batch = (
+            select(Booking.id)
+            .where(
+                Booking.status.in_(["cancelled", "rejected"]),
+                Booking.decision_at < cutoff,
+            )
+            .limit(CLEANUP_BATCH)
+        )
+        result = await db.execute(delete(Booking).where(Booking.id.in_(batch)))
+        await db.commit()
+        if result.rowcount < CLEANUP_BATCH:
+            break
+
+async def _cleanup_worker():
+    # first pass shortly after boot (off the startup path), then daily
+    delay = 60
+    while True:
+        await asyncio.sleep(delay)
+        delay = 24 * 3600
+        try:
+            async with SessionLocal() as db:
+                await cleanup_old_requests(db)
+            print("✅ Cleanup complete")
+        except Exception as e:
+            print(f"❌ Cleanup error: {e}")
+
+# 2.x select() statements built once at import so the compiled-SQL cache kicks in.
+# Column (not entity) selects: the list endpoints serialize rows straight to JSON,
+# so there is no point hydrating ORM objects or re-validating through Pydantic.
+LIST_STMT = select(
+    Booking.id,
+    Booking.requester_name,
+    Booking.requester_email,
+    Booking.start_date,
+    Booking.end_date,
+    Booking.status,
+    Booking.notes,
+).order_by(Booking.start_date.asc(), Booking.id.asc())
+APPROVED_STMT = LIST_STMT.where(Booking.status == "approved")
+
+# /api/bookings/approved is public and read-heavy but only changes on
+# approve/cancel. Cache the serialized list in-process: mutations clear it, a
+# short TTL bounds staleness across worker processes, and a content-derived
+# ETag lets clients revalidate to a 304 with no body at all.
+APPROVED_CACHE_TTL = 30.0  # seconds
+_approved_cache = {"body": None, "etag": None, "at": 0.0}
+
+def _invalidate_approved_cache():
+    _approved_cache["body"] = None
 
 # --- routes ---
 @app.api_route("/api/health" ,methods=["GET", "HEAD"])
-def health():
-    return {"ok": True, "time": datetime.utcnow().isoformat()}
+async def health():
+    return {"ok": True, "time": utcnow().isoformat()}
 
 @app.get("/api/admin/verify")
-def admin_verify(x_admin_secret: Optional[str] = Header(default=None, alias="X-Admin-Secret")):
+async def admin_verify(x_admin_secret: Optional[str] = Header(default=None, alias="X-Admin-Secret")):
     require_admin(x_admin_secret)
     return {"ok": True}
 
 @app.post("/api/requests", response_model=BookingOut)
-def create_request(
+async def create_request(
     payload: BookingIn,
-    db: Session = Depends(get_db),
-    background_tasks: BackgroundTasks = None,
+    db: AsyncSession = Depends(get_db),
 ):
-    row = Booking(
-        requester_name=payload.requester_name.strip(),
-        requester_email=(payload.requester_email or None),
-        start_date=payload.start_date,
-        end_date=payload.end_date,
-        status="pending",
-        notes=(payload.notes or None),
-    )
-    db.add(row)
-    db.commit()
-    db.refresh(row)
+    # INSERT ... RETURNING folds the read of server defaults into the write,
+    # saving the extra SELECT round-trip a db.refresh would cost
+    row = (
+        await db.execute(
+            insert(Booking)
+            .values(
+                requester_name=payload.requester_name.strip(),
+                requester_email=(payload.requester_email or None),
+                start_date=payload.start_date,
+                end_date=payload.end_date,
+                status="pending",
+                notes=(payload.notes or None),
+                # stamped explicitly: pre-existing tables predate the
+                # server_default on created_at and create_all won't add it
+                created_at=func.now(),
+            )
+            .returning(Booking)
+        )
+    ).scalar_one()
+    await db.commit()
 
     # ---- Email notification ----
-    if background_tasks:
-        subject = f"🔔 New Booking Request from {row.requester_name}"
-        body = (
-            f"A new booking request has been submitted.\n\n"
-            f"Name: {row.requester_name}\n"
-            f"Email: {row.requester_email}\n"
-            f"Dates: {row.start_date} → {row.end_date}\n"
-            f"Notes: {row.notes or '-'}\n"
-            f"Status: {row.status}\n\n"
-            f"For managing requests: https://booking-app-com.onrender.com\n"
-        )
-        background_tasks.add_task(send_email, NOTIFY_EMAIL, subject, body)
+    subject = f"🔔 New Booking Request from {row.requester_name}"
+    body = NEW_REQUEST_BODY_TPL.substitute(
+        name=row.requester_name,
+        email=row.requester_email,
+        start=row.start_date,
+        end=row.end_date,
+        notes=row.notes or "-",
+        status=row.status,
+    )
+    send_email(NOTIFY_EMAIL, subject, body)
 
     return row
 
-@app.get("/api/requests", response_model=List[BookingOut])
-def list_requests(
+@app.get("/api/requests", response_model=None)
+async def list_requests(
     status: Optional[Status] = Query(default=None),
     active: Optional[bool] = Query(default=None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     x_admin_secret: Optional[str] = Header(default=None, alias="X-Admin-Secret"),
 ):
     require_admin(x_admin_secret)  # only admin can see requests
-    q = db.query(Booking)
+    stmt = LIST_STMT
     if active:
-        q = q.filter(Booking.status.in_(("pending", "approved")))
+        stmt = stmt.where(Booking.status.in_(("pending", "approved")))
     elif status:
-        q = q.filter(Booking.status == status.value)
-    return q.order_by(Booking.start_date.asc(), Booking.id.asc()).all()
-
-@app.get("/api/bookings/approved", response_model=List[BookingOut])
-def approved_bookings(db: Session = Depends(get_db)):
-    return (
-        db.query(Booking)
-        .filter(Booking.status == "approved")
-        .order_by(Booking.start_date.asc(), Booking.id.asc())
-        .all()
-    )
+        stmt = stmt.where(Booking.status == status.value)
+    rows = [dict(r._mapping) for r in await db.execute(stmt)]
+    # hand back orjson bytes directly; returning the list would send it through
+    # jsonable_encoder first and re-serialize row by row
+    return Response(content=orjson.dumps(rows), media_type="application/json")
+
+@app.get("/api/bookings/approved", response_model=None)
+async def approved_bookings(
+    db: AsyncSession = Depends(get_db),
+    if_none_match: Optional[str] = Header(default=None, alias="If-None-Match"),
+):
+    cache = _approved_cache
+    if cache["body"] is None or time.monotonic() - cache["at"] > APPROVED_CACHE_TTL:
+        rows = [dict(r._mapping) for r in await db.execute(APPROVED_STMT)]
+        cache["body"] = orjson.dumps(rows)
+        cache["etag"] = f'W/"{hashlib.md5(cache["body"]).hexdigest()}"'
+        cache["at"] = time.monotonic()
+    headers = {"ETag": cache["etag"], "Cache-Control": "no-cache"}
+    if if_none_match == cache["etag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=cache["body"], media_type="application/json", headers=headers)
 
 @app.post("/api/requests/{req_id}/approve", response_model=BookingOut)
-def approve_request(
+async def approve_request(
     req_id: int,
-    db: Session = Depends(get_db),
-    background_tasks: BackgroundTasks = None,
+    db: AsyncSession = Depends(get_db),
     x_admin_secret: Optional[str] = Header(default=None, alias="X-Admin-Secret"),
 ):
     require_admin(x_admin_secret)
 
-    row = db.get(Booking, req_id)
+    row = await db.get(Booking, req_id)
     if not row:
         raise HTTPException(404, "Request not found")
     if row.status != "pending":
         raise HTTPException(409, f"Cannot approve request in status {row.status}")
 
-    conflicts = (
-        db.query(Booking)
-        .filter(Booking.status == "approved")
-        .filter(Booking.end_date > row.start_date)
-        .filter(Booking.start_date < row.end_date)
-        .all()
+    # SELECT 1 ... LIMIT 1 existence probe instead of pulling every overlapping row
+    conflict_q = (
+        select(Booking.id)
+        .where(Booking.status == "approved")
+        .where(Booking.end_date > row.start_date)
+        .where(Booking.start_date < row.end_date)
+        .limit(1)
     )
-    if conflicts:
+    if (await db.execute(select(conflict_q.exists()))).scalar():
         raise HTTPException(409, "Date conflict with an existing approved booking")
 
-    row.status = "approved"
-    row.decision_at = datetime.utcnow()
-    row.decided_by = "Mom"
-    db.commit()
-    db.refresh(row)
+    # let the DB stamp decision_at so we don't ship a Python datetime in the binds.
+    # The no_overlap EXCLUDE constraint (Postgres) backstops the probe above in
+    # case two admins approve concurrently.
+    try:
+        row = (
+            await db.execute(
+                update(Booking)
+                .where(Booking.id == req_id)
+                .values(status="approved", decision_at=func.now(), decided_by="Mom")
+                .returning(Booking)
+            )
+        ).scalar_one()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(409, "Date conflict with an existing approved booking")
+    _invalidate_approved_cache()
 
     # ✉️ Notify requester
-    if background_tasks:
-        subject = "🎉 Your booking has been approved"
-        body = (
-            f"Hi {row.requester_name},\n\n"
-            f"Your booking request for {row.start_date} → {row.end_date} has been approved.\n"
-        )
-        background_tasks.add_task(send_email, row.requester_email, subject, body)
+    notify_decision(row)
 
     return row
 
 @app.post("/api/requests/{req_id}/reject", response_model=BookingOut)
-def reject_request(
+async def reject_request(
     req_id: int,
-    db: Session = Depends(get_db),
-    background_tasks: BackgroundTasks = None,
+    db: AsyncSession = Depends(get_db),
     x_admin_secret: Optional[str] = Header(default=None, alias="X-Admin-Secret"),
 ):
     require_admin(x_admin_secret)
 
-    row = db.get(Booking, req_id)
+    row = await db.get(Booking, req_id)
     if not row:
         raise HTTPException(404, "Request not found")
     if row.status != "pending":
         raise HTTPException(409, f"Cannot reject request in status {row.status}")
 
-    row.status = "rejected"
-    row.decision_at = datetime.utcnow()
-    row.decided_by = "Mom"
-    db.commit()
-    db.refresh(row)
+    row = (
+        await db.execute(
+            update(Booking)
+            .where(Booking.id == req_id)
+            .values(status="rejected", decision_at=func.now(), decided_by="Mom")
+            .returning(Booking)
+        )
+    ).scalar_one()
+    await db.commit()
 
     # ✉️ Notify requester
-    if background_tasks:
-        subject = "❌ Your booking has been rejected"
-        body = (
-            f"Hi {row.requester_name},\n\n"
-            f"Your booking request for {row.start_date} → {row.end_date} has been rejected.\n"
-        )
-        background_tasks.add_task(send_email, row.requester_email, subject, body)
-        
+    notify_decision(row)
+
     return row
 
 @app.post("/api/requests/{req_id}/cancel", response_model=BookingOut)
-def cancel_request(
+async def cancel_request(
     req_id: int,
     # payload: CancelIn | None = None,
-    db: Session = Depends(get_db),
-    background_tasks: BackgroundTasks = None,
+    db: AsyncSession = Depends(get_db),
     x_admin_secret: Optional[str] = Header(default=None, alias="X-Admin-Secret"),
 ):
     require_admin(x_admin_secret)
 
-    row = db.get(Booking, req_id)
+    row = await db.get(Booking, req_id)
     if not row:
         raise HTTPException(404, "Request not found")
     if row.status != "approved":
         raise HTTPException(409, f"Only approved bookings can be cancelled (current: {row.status})")
 
-    row.status = "cancelled"
-    row.decision_at = datetime.utcnow()
-    row.decided_by = "Mom"
     # if payload and payload.reason:
     #     row.notes = (row.notes or "") + f"\n[Cancelled]: {payload.reason}"
-    db.commit()
-    db.refresh(row)
+    row = (
+        await db.execute(
+            update(Booking)
+            .where(Booking.id == req_id)
+            .values(status="cancelled", decision_at=func.now(), decided_by="Mom")
+            .returning(Booking)
+        )
+    ).scalar_one()
+    await db.commit()
+    _invalidate_approved_cache()
 
     # ✉️ Notify requester
-    if background_tasks:
-        subject = "⚠️ Your booking has been cancelled"
-        body = (
-            f"Hi {row.requester_name},\n\n"
-            f"Your booking request for {row.start_date} → {row.end_date} has been cancelled.\n"
-        )
-        background_tasks.add_task(send_email, row.requester_email, subject, body)
-        
-    return row
+    notify_decision(row)
 
-@app.on_event("startup")
-def startup_cleanup():
-    db = SessionLocal()
-    try:
-        cleanup_old_requests(db)
-        print("✅ Startup cleanup complete")
-    except Exception as e:
-        print(f"❌ Startup cleanup error: {e}")
-    finally:
-        db.close()
\ No newline at end of file
+    return row
\ No newline at end of file